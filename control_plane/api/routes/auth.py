@@ -1,12 +1,24 @@
+import hashlib
+import threading
+import time
 from datetime import timedelta
 
+from cachetools import TTLCache
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+import jwt
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
 from control_plane.core.config import settings
-from control_plane.core.security import hash_password, verify_password, create_access_token
+from control_plane.core.security import (
+    hash_password,
+    hash_password_async,
+    verify_password_async,
+    create_access_token,
+    decode_access_token,
+)
 from control_plane.db.session import get_db
 from control_plane.models.user import User
 from control_plane.schemas.user import UserCreate, UserRead
@@ -14,30 +26,37 @@ from control_plane.schemas.auth import Token, TokenData
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+# verified against when the email is unknown, so every login costs one hash
+_DUMMY_HASH = hash_password("invalid-password-placeholder")
+
 
 @router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
-def register_user(payload: UserCreate, db: Session = Depends(get_db)):
-    existing = db.query(User).filter(User.email == payload.email).first()
+async def register_user(payload: UserCreate, db: AsyncSession = Depends(get_db)):
+    existing = await db.scalar(select(exists().where(User.email == payload.email)))
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
 
     user = User(
         email=payload.email,
-        hashed_password=hash_password(payload.password),
+        hashed_password=await hash_password_async(payload.password),
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return user
 
 
 @router.post("/login", response_model=Token)
-def login_for_access_token(
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await db.scalar(select(User).where(User.email == form_data.username).limit(1))
+    is_valid = await verify_password_async(
+        form_data.password,
+        user.hashed_password if user else _DUMMY_HASH,
+    )
+    if not user or not is_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -55,10 +74,15 @@ from fastapi.security import OAuth2PasswordBearer
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# Verified tokens -> (exp, user column values). Keyed by a digest so raw
+# tokens are not retained; failures are never cached.
+_token_cache: TTLCache = TTLCache(maxsize=10_000, ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+_token_cache_lock = threading.Lock()
+
 
-def get_current_user(
+async def get_current_user(
     token: str = Security(oauth2_scheme),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -66,16 +90,38 @@ def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+    cache_key = hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+    with _token_cache_lock:
+        cached = _token_cache.get(cache_key)
+
+    if cached is not None:
+        exp, user_row = cached
+        if exp > time.time():
+            # rebuild the user from cache and attach it without a SELECT
+            user = User(**user_row)
+            make_transient_to_detached(user)
+            db.add(user)
+            return user
+        with _token_cache_lock:
+            _token_cache.pop(cache_key, None)
+
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = decode_access_token(token)
         sub = payload.get("sub")
         if sub is None:
             raise credentials_exception
         token_data = TokenData(user_id=int(sub))
-    except (JWTError, ValueError):
+    except (jwt.PyJWTError, ValueError):
         raise credentials_exception
 
-    user = db.query(User).filter(User.id == token_data.user_id).first()
+    user = await db.scalar(select(User).where(User.id == token_data.user_id).limit(1))
     if user is None:
         raise credentials_exception
+
+    exp = payload.get("exp")
+    if exp is not None:
+        user_row = {column: getattr(user, column) for column in User.__table__.columns.keys()}
+        with _token_cache_lock:
+            _token_cache[cache_key] = (exp, user_row)
+
     return user
@@ -1,14 +1,15 @@
 # app/api/routes/files.py
 
-from typing import Optional
+from collections import defaultdict
+from typing import AsyncIterator, Optional
 
-from fastapi import APIRouter, Depends, File, UploadFile, Query, HTTPException, status
+from fastapi import APIRouter, Depends, File, UploadFile, Query, HTTPException, Request, status
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 import httpx
-import uuid
 
-from control_plane.core.config import settings
+from control_plane.core.config import Settings, get_settings
 from control_plane.db.session import get_db
 from control_plane.models.file import File as FileModel
 from control_plane.models.user import User
@@ -23,42 +24,55 @@ from control_plane.models.chunk import Chunk
 from control_plane.models.chunk_locations import ChunkLocation
 from control_plane.models.file_versions import FileVersion
 from control_plane.models.file_permission import FilePermission
-from control_plane.services.permissions import get_file_for_user
+from control_plane.core.cache import cache_delete
+from control_plane.services.permissions import get_file_for_user, permission_cache_key
 from control_plane.services.storage_client import (
     select_nodes_for_chunk_consistent,
+    new_chunk_ids,
     replicate_chunk,
+    save_chunk_rows,
 )
 
 router = APIRouter(prefix="/files", tags=["files"])
 
 
+async def _read_chunks(upload: UploadFile, chunk_size: int) -> AsyncIterator[bytes]:
+    """
+    Yield the uploaded content in chunk_size pieces until EOF.
+    """
+    while data := await upload.read(chunk_size):
+        yield data
+
+
 @router.post("/upload", response_model=FileUploadResponse)
-def upload_file(
+async def upload_file(
+    request: Request,
     file: UploadFile = File(...),
     folder_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    settings: Settings = Depends(get_settings),
 ):
     # 1. Find or create File
-    db_file = (
-        db.query(FileModel)
-        .filter(
+    db_file = await db.scalar(
+        select(FileModel)
+        .where(
             FileModel.name == file.filename,
             FileModel.owner_id == current_user.id,
             FileModel.folder_id == folder_id,
         )
-        .first()
+        .limit(1)
     )
 
-    if not db_file:
+    created = db_file is None
+    if created:
         db_file = FileModel(
             name=file.filename,
             owner_id=current_user.id,
             folder_id=folder_id,
         )
         db.add(db_file)
-        db.commit()
-        db.refresh(db_file)
+        await db.flush()  # assigns db_file.id; everything commits once at the end
 
         owner_permission = FilePermission(
         file_id=db_file.id,
@@ -67,24 +81,27 @@ def upload_file(
         )
         
         db.add(owner_permission)
-        db.commit()
-
-    get_file_for_user(
-        db=db,
-        file_id=db_file.id,
-        user_id=current_user.id,
-        required_role="write",
-    )
+        await db.flush()
+    else:
+        # only existing files need the check: a file created above is owned by
+        # construction, and checking it would cache rows that may yet roll back
+        await get_file_for_user(
+            db=db,
+            file_id=db_file.id,
+            user_id=current_user.id,
+            required_role="write",
+        )
 
-    # 2. Determine next version number
-    latest_version = (
-        db.query(FileVersion)
-        .filter(FileVersion.file_id == db_file.id)
+    # 2. Determine next version number (only the number; served from the
+    # (file_id, version_number DESC) index)
+    latest_number = await db.scalar(
+        select(FileVersion.version_number)
+        .where(FileVersion.file_id == db_file.id)
         .order_by(FileVersion.version_number.desc())
-        .first()
+        .limit(1)
     )
 
-    next_version = 1 if not latest_version else latest_version.version_number + 1
+    next_version = 1 if latest_number is None else latest_number + 1
 
     # 3. Create FileVersion
     version = FileVersion(
@@ -93,51 +110,59 @@ def upload_file(
         size_bytes=0,
     )
     db.add(version)
-    db.commit()
-    db.refresh(version)
+    await db.flush()
 
     # 4. Chunk + replicate
     total_size = 0
     index = 0
+    chunk_rows = []
+    location_rows = []
     chunk_size = settings.CHUNK_SIZE_BYTES
+    client = request.app.state.http
+    chunk_ids = new_chunk_ids()
 
-    while True:
-        data = file.file.read(chunk_size)
-        if not data:
-            break
+    async for data in _read_chunks(file, chunk_size):
+        chunk_id = next(chunk_ids)
+        nodes = await select_nodes_for_chunk_consistent(chunk_id, db)
 
-        chunk_id = str(uuid.uuid4())
-        nodes = select_nodes_for_chunk_consistent(chunk_id, db)
-
-        replicate_chunk(
-            db=db,
+        chunk_row, chunk_location_rows = await replicate_chunk(
+            client=client,
             file_version_id=version.id,
             index=index,
             chunk_id=chunk_id,
             data=data,
             nodes=nodes,
         )
+        chunk_rows.append(chunk_row)
+        location_rows.extend(chunk_location_rows)
 
         total_size += len(data)
         index += 1
 
-    version.size_bytes = total_size
-    db.commit()
+    await save_chunk_rows(db, chunk_rows, location_rows)
 
-    return {
-    "file": db_file,
-    "version": version,
-    }
+    version.size_bytes = total_size
+    await db.commit()
+    if created:
+        # drop any "no access" entry cached for this id before it existed
+        await cache_delete(permission_cache_key(current_user.id, db_file.id))
+
+    return FileUploadResponse.model_construct(
+        file=FileRead.from_orm_fast(db_file),
+        version=FileVersionRead.from_orm_fast(version),
+    )
 
 
 
 
 @router.post("/{file_id}/versions", response_model=FileVersionRead, status_code=status.HTTP_201_CREATED)
-def upload_new_version(
+async def upload_new_version(
+    request: Request,
     file_id: int,
     upload: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    settings: Settings = Depends(get_settings),
 ):
     """
     Upload a new version for an existing file.
@@ -148,7 +173,7 @@ def upload_new_version(
     """
 
     # 1) Permission check: must be allowed to edit this file
-    file_obj: FileModel = get_file_for_user(
+    file_obj: FileModel = await get_file_for_user(
         db=db,
         file_id=file_id,
         user_id=current_user.id,
@@ -156,13 +181,13 @@ def upload_new_version(
     )
 
     # 2) Determine next version number for this file
-    latest_version = (
-        db.query(FileVersion)
-        .filter(FileVersion.file_id == file_obj.id)
+    latest_number = await db.scalar(
+        select(FileVersion.version_number)
+        .where(FileVersion.file_id == file_obj.id)
         .order_by(FileVersion.version_number.desc())
-        .first()
+        .limit(1)
     )
-    next_version = 1 if not latest_version else latest_version.version_number + 1
+    next_version = 1 if latest_number is None else latest_number + 1
 
     # 3) Create FileVersion row (size filled after upload)
     version = FileVersion(
@@ -171,32 +196,33 @@ def upload_new_version(
         size_bytes=0,
     )
     db.add(version)
-    db.commit()
-    db.refresh(version)
+    await db.flush()
 
     # 4) Chunk + replicate
     total_size = 0
     index = 0
+    chunk_rows = []
+    location_rows = []
     chunk_size = settings.CHUNK_SIZE_BYTES
+    client = request.app.state.http
+    chunk_ids = new_chunk_ids()
 
-    while True:
-        data = upload.file.read(chunk_size)
-        if not data:
-            break
-
-        chunk_id = str(uuid.uuid4())
+    async for data in _read_chunks(upload, chunk_size):
+        chunk_id = next(chunk_ids)
 
         # Consistent hashing decides primary+replicas for THIS chunk_id
-        nodes = select_nodes_for_chunk_consistent(chunk_id=chunk_id, db=db)
+        nodes = await select_nodes_for_chunk_consistent(chunk_id=chunk_id, db=db)
 
-        replicate_chunk(
-            db=db,
+        chunk_row, chunk_location_rows = await replicate_chunk(
+            client=client,
             file_version_id=version.id,
             index=index,
             chunk_id=chunk_id,
             data=data,
             nodes=nodes,
         )
+        chunk_rows.append(chunk_row)
+        location_rows.extend(chunk_location_rows)
 
         total_size += len(data)
         index += 1
@@ -204,20 +230,22 @@ def upload_new_version(
     if index == 0:
         raise HTTPException(status_code=400, detail="Uploaded file is empty")
 
-    # 5) Update version size
+    # 5) Store chunk metadata and version size in one transaction
+    await save_chunk_rows(db, chunk_rows, location_rows)
     version.size_bytes = total_size
-    db.commit()
-    db.refresh(version)
+    await db.commit()
+    await db.refresh(version)
 
     return version
 
 
 
 @router.get("/{file_id}/download")
-def download_file(
+async def download_file(
+    request: Request,
     file_id: int,
     version: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     # 1. Validate file ownership
@@ -229,7 +257,7 @@ def download_file(
     #     )
     #     .first()
     # )
-    db_file = get_file_for_user(
+    db_file = await get_file_for_user(
     db=db,
     file_id=file_id,
     user_id=current_user.id,
@@ -241,70 +269,84 @@ def download_file(
 
     # 2. Select file version
     if version is None:
-        # latest version (versions are ordered desc)
-        if not db_file.versions:
+        # latest version only, rather than loading every version of the file
+        file_version = await db.scalar(
+            select(FileVersion)
+            .where(FileVersion.file_id == db_file.id)
+            .order_by(FileVersion.version_number.desc())
+            .limit(1)
+        )
+        if not file_version:
             raise HTTPException(status_code=404, detail="No versions found for file")
-        file_version = db_file.versions[0]
     else:
-        file_version = (
-            db.query(FileVersion)
-            .filter(
+        file_version = await db.scalar(
+            select(FileVersion)
+            .where(
                 FileVersion.file_id == db_file.id,
                 FileVersion.version_number == version,
             )
-            .first()
+            .limit(1)
         )
 
     if not file_version:
         raise HTTPException(status_code=404, detail="Version not found")
 
-    # 3. Load chunks in correct order
-    chunks = (
-        db.query(Chunk)
-        .filter(Chunk.file_version_id == file_version.id)
-        .order_by(Chunk.index.asc())
-        .all()
+    # 3. Load chunks and their online replicas in one query
+    result = await db.execute(
+        select(Chunk.id, Chunk.index, Node.id, Node.base_url)
+        .outerjoin(ChunkLocation, ChunkLocation.chunk_id == Chunk.id)
+        .outerjoin(Node, and_(Node.id == ChunkLocation.node_id, Node.is_online.is_(True)))
+        .where(Chunk.file_version_id == file_version.id)
+        .order_by(Chunk.index.asc(), ChunkLocation.id.asc())
     )
+    rows = result.all()
 
-    if not chunks:
+    if not rows:
         raise HTTPException(
             status_code=500,
             detail="No chunks found for this file version",
         )
 
-    # 4. Stream chunks sequentially with replica failover
-    def stream_file_bytes():
-        for chunk in chunks:
-            # Fetch all ONLINE replicas for this chunk
-            locations = (
-                db.query(ChunkLocation)
-                .join(Node, ChunkLocation.node_id == Node.id)
-                .filter(
-                    ChunkLocation.chunk_id == chunk.id,
-                    Node.is_online.is_(True),
-                )
-                .all()
+    chunks = []  # (chunk_id, index) in file order
+    locations_by_chunk = defaultdict(list)  # chunk_id -> online node ids
+    node_base_by_id = {}  # node_id -> base URL, normalized once per node
+    for chunk_id, chunk_index, node_id, base_url in rows:
+        if not chunks or chunks[-1][0] != chunk_id:
+            chunks.append((chunk_id, chunk_index))
+        if node_id is not None:
+            locations_by_chunk[chunk_id].append(node_id)
+            if node_id not in node_base_by_id:
+                node_base_by_id[node_id] = base_url.rstrip("/")
+
+    for chunk_id, chunk_index in chunks:
+        if not locations_by_chunk[chunk_id]:
+            raise HTTPException(
+                status_code=503,
+                detail=f"No online replicas available for chunk {chunk_index}",
             )
 
-            if not locations:
-                raise HTTPException(
-                    status_code=503,
-                    detail=f"No online replicas available for chunk {chunk.index}",
-                )
+    # 4. Stream chunks sequentially with replica failover
+    client = request.app.state.http
+
+    async def stream_file_bytes():
+        # bind to locals: the loop below runs once per chunk per replica
+        stream = client.stream
+        replicas = locations_by_chunk
+        node_bases = node_base_by_id
 
+        for chunk_id, chunk_index in chunks:
             chunk_served = False
 
             # Try replicas in order
-            for location in locations:
-                node = location.node
-                url = f"{node.base_url.rstrip('/')}/chunks/{chunk.id}"
+            for node_id in replicas[chunk_id]:
+                url = f"{node_bases[node_id]}/chunks/{chunk_id}"
 
                 try:
-                    with httpx.stream("GET", url, timeout=30.0) as response:
+                    async with stream("GET", url) as response:
                         if response.status_code != 200:
                             continue
 
-                        for data in response.iter_bytes():
+                        async for data in response.aiter_bytes():
                             if data:
                                 yield data
 
@@ -318,7 +360,7 @@ def download_file(
             if not chunk_served:
                 raise HTTPException(
                     status_code=502,
-                    detail=f"All replicas failed for chunk {chunk.index}",
+                    detail=f"All replicas failed for chunk {chunk_index}",
                 )
 
     # 5. Return streaming response
@@ -327,6 +369,10 @@ def download_file(
         "Content-Disposition": f'attachment; filename="{db_file.name}"'
     }
 
+    # Everything the stream needs is in memory now; give the connection back
+    # to the pool instead of holding it for the whole transfer.
+    await db.close()
+
     return StreamingResponse(
         stream_file_bytes(),
         media_type=media_type,
@@ -336,13 +382,13 @@ def download_file(
 
 
 @router.get("/{file_id}/versions", response_model=list[FileVersionRead])
-def list_versions(
+async def list_versions(
     file_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     # ✅ Permission check first (shared users with read/write/owner should pass)
-    get_file_for_user(
+    await get_file_for_user(
         db=db,
         file_id=file_id,
         user_id=current_user.id,
@@ -350,36 +396,38 @@ def list_versions(
     )
 
     # ✅ Then return versions (no owner_id filter needed)
-    return (
-        db.query(FileVersion)
-        .filter(FileVersion.file_id == file_id)
-        .order_by(FileVersion.version_number.desc())
-        .all()
-    )
+    versions = (
+        await db.scalars(
+            select(FileVersion)
+            .where(FileVersion.file_id == file_id)
+            .order_by(FileVersion.version_number.desc())
+        )
+    ).all()
+    return [FileVersionRead.from_orm_fast(version) for version in versions]
 
 
 @router.post("/{file_id}/share")
-def share_file(
+async def share_file(
     file_id: int,
     payload: ShareFileRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     # Owner check
-    get_file_for_user(
+    await get_file_for_user(
         db=db,
         file_id=file_id,
         user_id=current_user.id,
         required_role="owner",
     )
 
-    permission = (
-        db.query(FilePermission)
-        .filter(
+    permission = await db.scalar(
+        select(FilePermission)
+        .where(
             FilePermission.file_id == file_id,
             FilePermission.user_id == payload.user_id,
         )
-        .first()
+        .limit(1)
     )
 
     if permission:
@@ -392,18 +440,19 @@ def share_file(
         )
         db.add(permission)
 
-    db.commit()
+    await db.commit()
+    await cache_delete(permission_cache_key(payload.user_id, file_id))
 
     return {"message": "File shared successfully"}
 
 
 @router.get("/{file_id}/permissions")
-def list_permissions(
+async def list_permissions(
     file_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    get_file_for_user(
+    await get_file_for_user(
         db=db,
         file_id=file_id,
         user_id=current_user.id,
@@ -411,45 +460,49 @@ def list_permissions(
     )
 
     return (
-        db.query(FilePermission)
-        .filter(FilePermission.file_id == file_id)
-        .all()
-    )
+        await db.scalars(
+            select(FilePermission)
+            .where(FilePermission.file_id == file_id)
+        )
+    ).all()
 
 
 @router.delete("/{file_id}/delete", status_code=status.HTTP_200_OK)
-def delete_file(
+async def delete_file(
     file_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     # 1) File must exist
-    file_obj = db.query(FileModel).filter(FileModel.id == file_id).first()
-    if not file_obj:
+    found_id = await db.scalar(select(FileModel.id).where(FileModel.id == file_id).limit(1))
+    if found_id is None:
         raise HTTPException(status_code=404, detail="File not found")
 
     # 2) Only OWNER can delete
-    perm = (
-        db.query(FilePermission)
-        .filter(
+    role = await db.scalar(
+        select(FilePermission.role)
+        .where(
             FilePermission.file_id == file_id,
             FilePermission.user_id == current_user.id,
         )
-        .first()
+        .limit(1)
     )
 
-    if not perm or perm.role != "owner":
+    if role != "owner":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only the file owner can delete this file",
         )
 
     # 3) Delete the file record
-    # IMPORTANT:
-    # - If you set cascading correctly on relationships / foreign keys,
-    #   versions/chunks/locations/permissions will delete automatically.
-    db.delete(file_obj)
-    db.commit()
+    # plain DELETE; the FKs' ON DELETE CASCADE removes versions, chunks,
+    # locations and permissions without the ORM loading any of them
+    user_ids = (
+        await db.scalars(select(FilePermission.user_id).where(FilePermission.file_id == file_id))
+    ).all()
+    await db.execute(delete(FileModel).where(FileModel.id == file_id))
+    await db.commit()
+    await cache_delete(*(permission_cache_key(user_id, file_id) for user_id in user_ids))
 
     return {"message": "File deleted successfully"}
 
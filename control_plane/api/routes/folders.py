@@ -1,54 +1,56 @@
-from typing import List
+from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import exists
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, exists, select
 
 from control_plane.db.session import get_db
 from control_plane.models.folder import Folder
 from control_plane.models.user import User
 from control_plane.models.file import File as FileModel
-from control_plane.schemas.folder import FolderCreate, FolderRead
+from control_plane.schemas.folder import FolderCreate, FolderPage, FolderRead
 from control_plane.api.routes.auth import get_current_user
 
 router = APIRouter(prefix="/folders", tags=["folders"])
 
 
-@router.get("/all", response_model=List[FolderRead])
-def list_folders(
-    page: int = Query(1, ge=1, description="Page number (starting from 1)"),
-    db: Session = Depends(get_db),
+@router.get("/all", response_model=FolderPage)
+async def list_folders(
+    after_id: Optional[int] = Query(None, description="next_cursor from the previous page"),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     PAGE_SIZE = 10
-    skip = (page - 1) * PAGE_SIZE
-    
-    folders = (
-        db.query(Folder)
-        .filter(Folder.owner_id == current_user.id)
-        .order_by(Folder.created_at.desc())
-        .offset(skip) 
-        .limit(PAGE_SIZE)
-        .all()
+
+    # keyset pagination: newest first, continuing below the last id seen
+    query = select(Folder).where(Folder.owner_id == current_user.id)
+    if after_id is not None:
+        query = query.where(Folder.id < after_id)
+
+    folders = (await db.scalars(query.order_by(Folder.id.desc()).limit(PAGE_SIZE))).all()
+
+    next_cursor = folders[-1].id if len(folders) == PAGE_SIZE else None
+    return FolderPage.model_construct(
+        items=[FolderRead.from_orm_fast(folder) for folder in folders],
+        next_cursor=next_cursor,
     )
-    return folders
 
 
 @router.post("/create", response_model=FolderRead, status_code=status.HTTP_201_CREATED)
-def create_folder(
+async def create_folder(
     payload: FolderCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     # Optional: prevent duplicate names at same level
-    existing = (
-        db.query(Folder)
-        .filter(
-            Folder.owner_id == current_user.id,
-            Folder.name == payload.name,
-            Folder.parent_id == payload.parent_id,
+    existing = await db.scalar(
+        select(
+            exists().where(
+                Folder.owner_id == current_user.id,
+                Folder.name == payload.name,
+                Folder.parent_id == payload.parent_id,
+            )
         )
-        .first()
     )
     if existing:
         raise HTTPException(status_code=400, detail="Folder with that name already exists here")
@@ -59,34 +61,31 @@ def create_folder(
         parent_id=payload.parent_id,
     )
     db.add(folder)
-    db.commit()
-    db.refresh(folder)
+    await db.commit()
+    await db.refresh(folder)
     return folder
 
 
 @router.delete("/delete/{folder_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_folder(
+async def delete_folder(
     folder_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    # 1) Folder must exist and belong to current user
-    folder = (
-        db.query(Folder)
-        .filter(
-            Folder.id == folder_id,
-            Folder.owner_id == current_user.id,
+    # 1) Ownership and emptiness checks in a single round trip
+    result = await db.execute(
+        select(
+            exists().where(Folder.id == folder_id, Folder.owner_id == current_user.id),
+            exists().where(FileModel.folder_id == folder_id),
+            exists().where(Folder.parent_id == folder_id),
         )
-        .first()
     )
-    if not folder:
+    folder_exists, has_files, has_subfolders = result.one()
+
+    if not folder_exists:
         raise HTTPException(status_code=404, detail="Folder not found")
 
     # 2) Reject deletion if folder still contains files
-    has_files = db.query(
-        exists().where(FileModel.folder_id == folder_id)
-    ).scalar()
-
     if has_files:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -94,15 +93,15 @@ def delete_folder(
         )
 
     # also reject if folder contains subfolders, if you support nesting
-    has_subfolders = db.query(exists().where(Folder.parent_id == folder_id)).scalar()
     if has_subfolders:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Folder contains subfolders. Delete/move them first.",
         )
 
-    # 3) Delete the folder
-    db.delete(folder)
-    db.commit()
+    # 3) Delete the folder. It has no children, so a plain DELETE skips the
+    # ORM loading the children backref just to null out parent_id.
+    await db.execute(delete(Folder).where(Folder.id == folder_id))
+    await db.commit()
 
     return {"message": "Folder deleted successfully"}
\ No newline at end of file
@@ -1,25 +1,27 @@
-from typing import List
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from sqlalchemy import delete, exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from control_plane.db.session import get_db
 from control_plane.models.node import Node
-from control_plane.schemas.node import NodeCreate, NodeRead
+from control_plane.schemas.node import NodeCreate, NodePage, NodeRead
 from control_plane.api.routes.auth import get_current_user  # to require auth
 from control_plane.models.user import User
+from control_plane.services.storage_client import bump_topology_version
 
 router = APIRouter(prefix="/nodes", tags=["nodes"])
 
 
 @router.post("/create", response_model=NodeRead, status_code=status.HTTP_201_CREATED)
-def register_node(
+async def register_node(
     payload: NodeCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     # For now, let any logged-in user register. Later you can restrict to admins.
-    existing = db.query(Node).filter(Node.name == payload.name).first()
+    existing = await db.scalar(select(exists().where(Node.name == payload.name)))
     if existing:
         raise HTTPException(status_code=400, detail="Node with that name already exists")
 
@@ -30,47 +32,55 @@ def register_node(
         capacity_bytes=payload.capacity_bytes,
     )
     db.add(node)
-    db.commit()
-    db.refresh(node)
+    await db.commit()
+    await db.refresh(node)
+    bump_topology_version()
     return node
 
 
-@router.get("/all", response_model=List[NodeRead])
-def list_nodes(
-    page: int = Query(1, ge=1, description="Page number (starting from 1)"),
-    db: Session = Depends(get_db),
+@router.get("/all", response_model=NodePage)
+async def list_nodes(
+    after_id: Optional[int] = Query(None, description="next_cursor from the previous page"),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     page_size = 10
-    skip = (page - 1) * page_size
-
-    nodes = (
-        db.query(Node)
-        .order_by(Node.id.asc())
-        .offset(skip)
-        .limit(page_size)
-        .all()
-    )
 
-    return nodes
+    # keyset pagination on the primary key instead of OFFSET
+    query = select(Node)
+    if after_id is not None:
+        query = query.where(Node.id > after_id)
+
+    nodes = (await db.scalars(query.order_by(Node.id.asc()).limit(page_size))).all()
+
+    next_cursor = nodes[-1].id if len(nodes) == page_size else None
+    page = NodePage.model_construct(
+        items=[NodeRead.from_orm_fast(node) for node in nodes],
+        next_cursor=next_cursor,
+    )
+    # serialize straight to JSON and return it as-is: FastAPI skips response
+    # validation for a Response, and warnings=False accepts base_url as str
+    return Response(page.model_dump_json(warnings=False), media_type="application/json")
 
 
 @router.delete("/delete/{node_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_node(
+async def delete_node(
     node_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    node = db.query(Node).filter(Node.id == node_id).first()
+    # plain DELETE; the FK's ON DELETE CASCADE removes the node's chunk
+    # locations instead of the ORM loading every one of them first
+    result = await db.execute(delete(Node).where(Node.id == node_id))
 
-    if not node:
+    if result.rowcount == 0:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Node not found",
         )
 
-    db.delete(node)
-    db.commit()
+    await db.commit()
+    bump_topology_version()
 
     return None
 
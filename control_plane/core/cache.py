@@ -0,0 +1,72 @@
+import json
+from datetime import datetime
+from typing import Any, Optional
+
+import redis.asyncio
+from sqlalchemy import DateTime
+from sqlalchemy.orm import make_transient_to_detached
+
+from control_plane.core.config import settings
+
+# Optional read-through cache shared by all workers. With REDIS_URL unset
+# every get misses and set/delete do nothing, so callers need no checks.
+_client: Optional[redis.asyncio.Redis] = (
+    redis.asyncio.Redis.from_url(settings.REDIS_URL, socket_timeout=0.5)
+    if settings.REDIS_URL
+    else None
+)
+
+
+def _encode(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+async def cache_get(key: str) -> Any:
+    """
+    Return the cached JSON value, or None on a miss. Redis errors count as
+    a miss so an unavailable cache only costs the database query.
+    """
+    if _client is None:
+        return None
+    try:
+        raw = await _client.get(key)
+    except redis.RedisError:
+        return None
+    return None if raw is None else json.loads(raw)
+
+
+async def cache_set(key: str, value: Any, ttl: int) -> None:
+    if _client is None:
+        return
+    try:
+        await _client.setex(key, ttl, json.dumps(value, default=_encode))
+    except redis.RedisError:
+        pass
+
+
+async def cache_delete(*keys: str) -> None:
+    if _client is None or not keys:
+        return
+    try:
+        await _client.delete(*keys)
+    except redis.RedisError:
+        pass
+
+
+def dump_row(obj) -> dict:
+    return {column.key: getattr(obj, column.key) for column in obj.__table__.columns}
+
+
+def load_row(model, row: dict):
+    """
+    Rebuild a detached ORM instance from dump_row output read back from JSON.
+    """
+    for column in model.__table__.columns:
+        value = row.get(column.key)
+        if isinstance(column.type, DateTime) and isinstance(value, str):
+            row[column.key] = datetime.fromisoformat(value)
+    obj = model(**row)
+    make_transient_to_detached(obj)
+    return obj
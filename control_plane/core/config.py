@@ -1,17 +1,37 @@
+from functools import lru_cache
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Cloud Drive Backend"
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 32
+    DB_MAX_OVERFLOW: int = 64
+    REDIS_URL: str | None = None  # e.g. redis://localhost:6379/0; unset disables caching
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     ALGORITHM: str
-    CHUNK_SIZE_BYTES: int = 1048576
+    # larger chunks amortize per-chunk cost (id, DB rows, one PUT per replica);
+    # each upload in flight holds one chunk in memory, shared by its replica PUTs
+    CHUNK_SIZE_BYTES: int = 8388608  # 8 MiB
     REPLICATION_FACTOR: int = 3
+    # argon2 cost parameters; defaults are passlib's, so existing hashes verify
+    # at the same cost. Raise until a login takes the target latency.
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # KiB
 
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
 
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Read .env and validate once per process. Also usable as a FastAPI
+    dependency, so tests can swap it via app.dependency_overrides.
+    """
+    return Settings()
+
+
+settings = get_settings()
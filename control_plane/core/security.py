@@ -1,12 +1,50 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
-from jose import jwt
+import jwt
 from passlib.context import CryptContext
 
 from control_plane.core.config import settings
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+)
+
+# Password hashing gets its own pool, so a login burst cannot queue the
+# loop's default executor (which asyncio also uses for DNS lookups).
+_hash_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="argon2")
+
+
+def _load_jwt_keys():
+    """
+    Parse SECRET_KEY once into (signing key, verifying key) so jwt.encode /
+    jwt.decode get ready key objects instead of re-parsing a PEM per call.
+    For RS*/ES*/PS* SECRET_KEY is a PEM: a private key signs and verifies,
+    a public key can only verify. For HS* it is the shared secret as bytes.
+    """
+    if settings.ALGORITHM.startswith(("RS", "ES", "PS")):
+        from cryptography.hazmat.primitives.serialization import (
+            load_pem_private_key,
+            load_pem_public_key,
+        )
+
+        pem = settings.SECRET_KEY.encode("utf-8")
+        if b"PRIVATE KEY" in pem:
+            private_key = load_pem_private_key(pem, password=None)
+            return private_key, private_key.public_key()
+        return None, load_pem_public_key(pem)
+
+    secret = settings.SECRET_KEY.encode("utf-8")
+    return secret, secret
+
+
+_signing_key, _decoded_key = _load_jwt_keys()
 
 
 def hash_password(password: str) -> str:
@@ -17,11 +55,28 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def hash_password_async(password: str) -> str:
+    """
+    Hash on the dedicated hashing pool so the event loop stays free.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, verify_password, plain_password, hashed_password)
+
+
 def create_access_token(subject: str | int, expires_delta: Optional[timedelta] = None) -> str:
     if expires_delta is None:
         expires_delta = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
 
     expire = datetime.now(timezone.utc) + expires_delta
     to_encode = {"sub": str(subject), "exp": expire}
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _signing_key, algorithm=settings.ALGORITHM)
     return encoded_jwt
+
+
+def decode_access_token(token: str) -> dict:
+    return jwt.decode(token, _decoded_key, algorithms=[settings.ALGORITHM])
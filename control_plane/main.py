@@ -1,3 +1,4 @@
+import httpx
 from fastapi import FastAPI
 
 from control_plane.api.routes import auth, folders, nodes, file
@@ -9,10 +10,24 @@ import control_plane.models  # noqa: F401  # import models so metadata is popula
 control_plane = FastAPI(title="Cloud Drive Backend")
 
 
+@control_plane.on_event("startup")
+async def startup():
+    # one keep-alive client shared by every request that talks to storage nodes
+    control_plane.state.http = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+        timeout=httpx.Timeout(30.0, connect=5.0),
+    )
+
+
+@control_plane.on_event("shutdown")
+async def shutdown():
+    await control_plane.state.http.aclose()
+    await engine.dispose()
+
+
 # include routers
 control_plane.include_router(auth.router)
 control_plane.include_router(folders.router)
 control_plane.include_router(nodes.router)
 control_plane.include_router(file.router)
 
-
@@ -1,10 +1,11 @@
 from sqlalchemy import (
     Column,
     Integer,
-    String,
     DateTime,
     ForeignKey,
     BigInteger,
+    Index,
+    Uuid,
     func,
 )
 from sqlalchemy.orm import relationship
@@ -15,11 +16,11 @@ from control_plane.db.base import Base
 class Chunk(Base):
     __tablename__ = "chunks"
 
-    # We'll use the storage chunk_id as the primary key (UUID string)
-    id = Column(String, primary_key=True, index=True)
+    # We'll use the storage chunk_id as the primary key (native UUID, 16 bytes)
+    id = Column(Uuid, primary_key=True)
 
     # file_id = Column(Integer, ForeignKey("files.id", ondelete="CASCADE"), nullable=False)
-    file_version_id = Column(Integer, ForeignKey("file_versions.id", ondelete="CASCADE"), nullable=False, index=True)
+    file_version_id = Column(Integer, ForeignKey("file_versions.id", ondelete="CASCADE"), nullable=False)
     index = Column(Integer, nullable=False)  # 0,1,2,... order within file
     size_bytes = Column(BigInteger, nullable=False)
 
@@ -30,4 +31,10 @@ class Chunk(Base):
         "ChunkLocation",
         back_populates="chunk",
         cascade="all, delete-orphan",
+        passive_deletes=True,  # rows go via the FK's ON DELETE CASCADE
+    )
+
+    __table_args__ = (
+        # chunks of a version in order: a range scan with no sort
+        Index("ix_chunks_fv_index", "file_version_id", "index"),
     )
@@ -3,8 +3,8 @@ from sqlalchemy import (
     Integer,
     DateTime,
     ForeignKey,
-    String,
     UniqueConstraint,
+    Uuid,
     func,
 )
 from sqlalchemy.orm import relationship
@@ -16,7 +16,7 @@ class ChunkLocation(Base):
     __tablename__ = "chunk_locations"
 
     id = Column(Integer, primary_key=True, index=True)
-    chunk_id = Column(String, ForeignKey("chunks.id", ondelete="CASCADE"), nullable=False)
+    chunk_id = Column(Uuid, ForeignKey("chunks.id", ondelete="CASCADE"), nullable=False)
     node_id = Column(Integer, ForeignKey("nodes.id", ondelete="CASCADE"), nullable=False)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -5,6 +5,7 @@ from sqlalchemy import (
     DateTime,
     ForeignKey,
     BigInteger,
+    Index,
     func,
 )
 from sqlalchemy.orm import relationship
@@ -27,6 +28,12 @@ class File(Base):
         "FileVersion",
         back_populates="file",
         cascade="all, delete-orphan",
+        passive_deletes=True,  # rows go via the FK's ON DELETE CASCADE
         order_by="FileVersion.version_number.desc()",
     )
 
+    __table_args__ = (
+        # upload's find-or-create lookup by (owner, folder, name)
+        Index("ix_files_owner_folder_name", "owner_id", "folder_id", "name"),
+    )
+
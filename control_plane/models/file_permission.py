@@ -4,6 +4,7 @@ from sqlalchemy import (
     String,
     DateTime,
     ForeignKey,
+    Index,
     UniqueConstraint,
     func,
 )
@@ -33,4 +34,6 @@ class FilePermission(Base):
 
     __table_args__ = (
         UniqueConstraint("file_id", "user_id", name="uq_file_user_permission"),
+        # a user's permissions across files (the route always knows the user)
+        Index("ix_file_permissions_user_file", "user_id", "file_id"),
     )
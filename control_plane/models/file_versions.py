@@ -4,6 +4,7 @@ from sqlalchemy import (
     DateTime,
     ForeignKey,
     BigInteger,
+    Index,
     func,
 )
 from sqlalchemy.orm import relationship
@@ -20,7 +21,6 @@ class FileVersion(Base):
         Integer,
         ForeignKey("files.id", ondelete="CASCADE"),
         nullable=False,
-        index=True,
     )
 
     version_number = Column(Integer, nullable=False)
@@ -33,5 +33,11 @@ class FileVersion(Base):
         "Chunk",
         back_populates="file_version",
         cascade="all, delete-orphan",
+        passive_deletes=True,  # rows go via the FK's ON DELETE CASCADE
         order_by="Chunk.index",
     )
+
+    __table_args__ = (
+        # versions of a file, newest first (latest version, version lookups)
+        Index("ix_file_versions_file_ver", file_id, version_number.desc()),
+    )
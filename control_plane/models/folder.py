@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 from control_plane.db.base import Base
 
@@ -15,3 +15,10 @@ class Folder(Base):
 
     owner = relationship("User", back_populates="folders")
     parent = relationship("Folder", remote_side=[id], backref="children")
+
+    __table_args__ = (
+        # serves list_folders' keyset scan: WHERE owner_id = ? AND id < ? ORDER BY id DESC
+        Index("ix_folders_owner_id_id", "owner_id", "id"),
+        # create_folder's duplicate-name check
+        Index("ix_folders_owner_parent_name", "owner_id", "parent_id", "name"),
+    )
@@ -17,4 +17,5 @@ class Node(Base):
         "ChunkLocation",
         back_populates="node",
         cascade="all, delete-orphan",
+        passive_deletes=True,  # rows go via the FK's ON DELETE CASCADE
     )
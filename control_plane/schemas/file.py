@@ -18,3 +18,14 @@ class FileRead(BaseModel):
 
     class Config:
         from_attributes = True
+
+    @classmethod
+    def from_orm_fast(cls, obj) -> "FileRead":
+        # trusted ORM row: copy the columns without re-validating them
+        return cls.model_construct(
+            id=obj.id,
+            name=obj.name,
+            folder_id=obj.folder_id,
+            created_at=obj.created_at,
+            updated_at=obj.updated_at,
+        )
@@ -9,3 +9,13 @@ class FileVersionRead(BaseModel):
 
     class Config:
         from_attributes = True
+
+    @classmethod
+    def from_orm_fast(cls, obj) -> "FileVersionRead":
+        # trusted ORM row: copy the columns without re-validating them
+        return cls.model_construct(
+            id=obj.id,
+            version_number=obj.version_number,
+            size_bytes=obj.size_bytes,
+            created_at=obj.created_at,
+        )
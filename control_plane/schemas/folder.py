@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 
 
@@ -18,3 +18,18 @@ class FolderRead(FolderBase):
 
     class Config:
         from_attributes = True
+
+    @classmethod
+    def from_orm_fast(cls, obj) -> "FolderRead":
+        # trusted ORM row: copy the columns without re-validating them
+        return cls.model_construct(
+            id=obj.id,
+            name=obj.name,
+            parent_id=obj.parent_id,
+            created_at=obj.created_at,
+        )
+
+
+class FolderPage(BaseModel):
+    items: List[FolderRead]
+    next_cursor: Optional[int] = None  # pass as after_id to get the next page
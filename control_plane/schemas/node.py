@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, AnyHttpUrl
 
 
@@ -20,3 +20,21 @@ class NodeRead(NodeBase):
 
     class Config:
         from_attributes = True
+
+    @classmethod
+    def from_orm_fast(cls, obj) -> "NodeRead":
+        # trusted ORM row: copy the columns without re-validating them;
+        # base_url stays the str stored from an already validated AnyHttpUrl
+        return cls.model_construct(
+            id=obj.id,
+            name=obj.name,
+            base_url=obj.base_url,
+            is_online=obj.is_online,
+            capacity_bytes=obj.capacity_bytes,
+            created_at=obj.created_at,
+        )
+
+
+class NodePage(BaseModel):
+    items: List[NodeRead]
+    next_cursor: Optional[int] = None  # pass as after_id to get the next page
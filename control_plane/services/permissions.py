@@ -1,20 +1,39 @@
+from typing import Dict, FrozenSet, Tuple
+
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from control_plane.core.cache import cache_get, cache_set, dump_row, load_row
 from control_plane.models.file import File as FileModel
 from control_plane.models.file_permission import FilePermission
 
 
-ROLE_HIERARCHY = {
-    "read": {"read", "write", "owner"},
-    "write": {"write", "owner"},
-    "owner": {"owner"},
+ROLE_HIERARCHY: Dict[str, FrozenSet[str]] = {
+    "read": frozenset({"read", "write", "owner"}),
+    "write": frozenset({"write", "owner"}),
+    "owner": frozenset({"owner"}),
 }
 
+# (held role, required role) pairs that grant access, so a check is a
+# single set lookup
+_ALLOWED: FrozenSet[Tuple[str, str]] = frozenset(
+    (role, required_role)
+    for required_role, roles in ROLE_HIERARCHY.items()
+    for role in roles
+)
+
+PERMISSION_CACHE_TTL = 60  # seconds
+
+
+def permission_cache_key(user_id: int, file_id: int) -> str:
+    # role of user_id on file_id, or null role for "no access"
+    return f"perm:{user_id}:{file_id}"
 
-def get_file_for_user(
+
+async def get_file_for_user(
     *,
-    db: Session,
+    db: AsyncSession,
     file_id: int,
     user_id: int,
     required_role: str,
@@ -23,29 +42,42 @@ def get_file_for_user(
     Fetch file if user has required permission.
     Raises HTTPException if access is denied.
     """
-    permission = (
-        db.query(FilePermission)
-        .filter(
-            FilePermission.file_id == file_id,
-            FilePermission.user_id == user_id,
+    cache_key = permission_cache_key(user_id, file_id)
+    cached = await cache_get(cache_key)
+    if cached is not None:
+        role = cached["role"]
+        # attach the cached row without a SELECT (or reuse the loaded one)
+        file = await db.merge(load_row(FileModel, cached["file"]), load=False) if role else None
+    else:
+        # file and the user's role on it in one round trip
+        result = await db.execute(
+            select(FileModel, FilePermission.role)
+            .join(FilePermission, FilePermission.file_id == FileModel.id)
+            .where(
+                FileModel.id == file_id,
+                FilePermission.user_id == user_id,
+            )
+            .limit(1)
+        )
+        row = result.first()
+        file, role = row if row else (None, None)
+        await cache_set(
+            cache_key,
+            {"role": role, "file": dump_row(file) if file else None},
+            PERMISSION_CACHE_TTL,
         )
-        .first()
-    )
 
-    if not permission:
+    if role is None:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have access to this file",
         )
 
-    if permission.role not in ROLE_HIERARCHY[required_role]:
+    if (role, required_role) not in _ALLOWED:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=f"Requires {required_role} permission",
         )
 
-    file = db.query(FileModel).filter(FileModel.id == file_id).first()
-    if not file:
-        raise HTTPException(status_code=404, detail="File not found")
-
     return file
+
@@ -1,10 +1,16 @@
+import asyncio
+import bisect
+import functools
 import hashlib
+import itertools
+import time
 import uuid
-from typing import List, Tuple
+from typing import FrozenSet, Iterator, List, Tuple
 
 import httpx
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from control_plane.core.config import settings
 from control_plane.models.node import Node
@@ -12,13 +18,20 @@ from control_plane.models.chunk import Chunk
 from control_plane.models.chunk_locations import ChunkLocation
 
 
-def get_online_nodes(db: Session) -> List[Node]:
-    nodes = (
-        db.query(Node)
-        .filter(Node.is_online.is_(True))
+async def get_online_nodes(db: AsyncSession) -> List[Node]:
+    """
+    Online nodes by id, detached from the session so they stay usable in
+    the ring cache after this request's session commits or rolls back.
+    """
+    result = await db.scalars(
+        select(Node)
+        .where(Node.is_online.is_(True))
         .order_by(Node.id.asc())
-        .all()
     )
+    nodes = result.all()
+    for node in nodes:
+        db.expunge(node)
+
     if not nodes:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -26,29 +39,89 @@ def get_online_nodes(db: Session) -> List[Node]:
         )
     return nodes
 
+def new_chunk_ids() -> Iterator[uuid.UUID]:
+    """
+    Yield unique chunk ids for one upload. Only the first id draws from
+    os.urandom; the rest count up from it, so the chunk loop makes no
+    syscall per chunk.
+    """
+    start = uuid.uuid4().int
+    for offset in itertools.count():
+        yield uuid.UUID(int=(start + offset) % (1 << 128))
+
+
 def _hash_key(key: str) -> int:
-    # stable 256-bit integer from any string
-    return int(hashlib.sha256(key.encode("utf-8")).hexdigest(), 16)
+    # stable 64-bit integer from any string; plenty to order nodes on the ring
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+@functools.lru_cache(maxsize=4096)
+def _node_hash(node_id: int) -> int:
+    # a node's ring position never changes, so hash each id only once
+    # you can change the key to use name/host/etc.
+    return _hash_key(f"node-{node_id}")
+
+
+# (sorted hashes, node at each hash) as two parallel lists, so lookups can
+# bisect the plain int list
+HashRing = Tuple[List[int], List[Node]]
 
 
-def build_hash_ring(nodes: List[Node]) -> List[Tuple[int, Node]]:
+def build_hash_ring(nodes: List[Node]) -> HashRing:
     """
-    Build a simple hash ring: list of (hash, node), sorted by hash.
+    Build a simple hash ring: nodes and their hashes, sorted by hash.
     """
     ring: List[Tuple[int, Node]] = []
     for node in nodes:
-        # you can change the key to use name/host/etc.
-        node_key = f"node-{node.id}"
-        h = _hash_key(node_key)
+        h = _node_hash(node.id)
         ring.append((h, node))
 
+    # stable sort: nodes with equal hashes keep their id order
     ring.sort(key=lambda x: x[0])
-    return ring
+    return [h for h, _ in ring], [node for _, node in ring]
 
 
-def select_nodes_for_chunk_consistent(
-    chunk_id: str,
-    db: Session,
+# Bumped whenever a node is registered or removed through this process. The
+# first lookup after a bump re-reads the online nodes; so does the first one
+# after RING_TTL, which is how a change made through another worker shows up.
+# The ring is only rebuilt if the set of node ids and addresses changed.
+RING_TTL = 30.0  # seconds
+
+_topology_version = 0
+_ring_cache: Tuple[int, float, FrozenSet[Tuple[int, str]], List[Node], HashRing] | None = None
+
+
+def bump_topology_version() -> None:
+    global _topology_version
+    _topology_version += 1
+
+
+async def get_hash_ring(db: AsyncSession) -> Tuple[List[Node], HashRing]:
+    """
+    Return (online nodes, hash ring), querying only when the node topology
+    changed here or the ring is older than RING_TTL, and rebuilding only
+    when the node set differs.
+    """
+    global _ring_cache
+
+    version = _topology_version
+    now = time.monotonic()
+    if _ring_cache is None or _ring_cache[0] != version or now - _ring_cache[1] > RING_TTL:
+        nodes = await get_online_nodes(db)
+        # base_url too: a removed node's id can come back as a different node
+        node_keys = frozenset((node.id, node.base_url) for node in nodes)
+        if _ring_cache is not None and _ring_cache[2] == node_keys:
+            # same node set as before: keep the built ring
+            _ring_cache = (version, now, *_ring_cache[2:])
+        else:
+            _ring_cache = (version, now, node_keys, nodes, build_hash_ring(nodes))
+
+    return _ring_cache[3], _ring_cache[4]
+
+
+async def select_nodes_for_chunk_consistent(
+    chunk_id: uuid.UUID,
+    db: AsyncSession,
     replication_factor: int | None = None,
 ) -> List[Node]:
     """
@@ -59,88 +132,133 @@ def select_nodes_for_chunk_consistent(
     if replication_factor is None:
         replication_factor = settings.REPLICATION_FACTOR
 
-    nodes = get_online_nodes(db)
-    ring = build_hash_ring(nodes)
+    nodes, (ring_hashes, ring_nodes) = await get_hash_ring(db)
 
     if len(nodes) <= replication_factor:
         # fewer nodes than replication factor -> use them all
         return nodes
 
-    key_hash = _hash_key(chunk_id)
+    key_hash = _hash_key(str(chunk_id))
 
-    # find first node whose hash >= key_hash
-    start_idx = 0
-    for i, (h, _) in enumerate(ring):
-        if h >= key_hash:
-            start_idx = i
-            break
-    else:
-        # if none found, wrap to the first node
-        start_idx = 0
-
-    # walk ring to pick R distinct nodes
-    selected: List[Node] = []
-    i = start_idx
-    while len(selected) < replication_factor and len(selected) < len(ring):
-        node = ring[i][1]
-        if node not in selected:
-            selected.append(node)
-        i = (i + 1) % len(ring)
+    # find first node whose hash >= key_hash; past the end wraps to the first
+    start_idx = bisect.bisect_left(ring_hashes, key_hash) % len(ring_hashes)
+
+    # the ring holds each node exactly once, so the next R entries (wrapping
+    # around) are R distinct nodes: two slices, at most R elements copied
+    selected = ring_nodes[start_idx:start_idx + replication_factor]
+    if len(selected) < replication_factor:
+        selected += ring_nodes[:replication_factor - len(selected)]
 
     return selected
 
 
-def replicate_chunk(
-    db: Session,
+async def _put_chunk_to_node(
+    client: httpx.AsyncClient,
+    node: Node,
+    chunk_id: uuid.UUID,
+    data: bytes,
+    timeout: float,
+) -> Node:
+    url = f"{node.base_url.rstrip('/')}/chunks/{chunk_id}"
+
+    try:
+        resp = await client.put(url, content=data, timeout=timeout)
+    except httpx.RequestError as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Failed to reach storage node {node.name}: {e}",
+        )
+
+    if resp.status_code not in (200, 201):
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Node {node.name} returned {resp.status_code}: {resp.text}",
+        )
+
+    return node
+
+
+async def replicate_chunk(
+    client: httpx.AsyncClient,
     file_version_id: int,
     index: int,
-    chunk_id: str,
+    chunk_id: uuid.UUID,
     data: bytes,
     nodes: List[Node],
     timeout: float = 10.0,
-) -> Chunk:
+) -> Tuple[dict, List[dict]]:
     """
-    Upload a single chunk's bytes to all given nodes and create:
+    Upload a single chunk's bytes to all given nodes concurrently.
+    A majority of the nodes must succeed, otherwise the upload fails.
+
+    Returns the rows to insert once the whole upload is done:
       - 1 Chunk row
-      - N ChunkLocation rows
+      - 1 ChunkLocation row per node that stored it
     """
     size_bytes = len(data)
 
-    # 1) Create Chunk row
-    chunk = Chunk(
-        id=chunk_id,
-        file_version_id=file_version_id,
-        index=index,
-        size_bytes=size_bytes,
+    # 1) Upload to every node at once
+    results = await asyncio.gather(
+        *(_put_chunk_to_node(client, node, chunk_id, data, timeout) for node in nodes),
+        return_exceptions=True,
     )
-    db.add(chunk)
-    db.flush()  # chunk is now known to the session
+    stored = [result for result in results if isinstance(result, Node)]
 
-    # 2) Upload to each node & create ChunkLocation
-    for node in nodes:
-        url = f"{node.base_url.rstrip('/')}/chunks/{chunk_id}"
-
-        try:
-            resp = httpx.put(url, content=data, timeout=timeout)
-        except httpx.RequestError as e:
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail=f"Failed to reach storage node {node.name}: {e}",
-            )
-
-        if resp.status_code not in (200, 201):
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail=f"Node {node.name} returned {resp.status_code}: {resp.text}",
-            )
-
-        location = ChunkLocation(
-            chunk_id=chunk_id,
-            node_id=node.id,
+    quorum = len(nodes) // 2 + 1
+    if len(stored) < quorum:
+        errors = [result for result in results if isinstance(result, BaseException)]
+        detail = errors[0].detail if isinstance(errors[0], HTTPException) else str(errors[0])
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Chunk {index} stored on {len(stored)}/{len(nodes)} nodes, need {quorum}: {detail}",
         )
-        db.add(location)
 
-    return chunk
+    # 2) Describe the rows; the caller inserts them in bulk
+    chunk_row = {
+        "id": chunk_id,
+        "file_version_id": file_version_id,
+        "index": index,
+        "size_bytes": size_bytes,
+    }
+    location_rows = [{"chunk_id": chunk_id, "node_id": node.id} for node in stored]
+
+    return chunk_row, location_rows
+
+
+async def _copy_rows(db: AsyncSession, table: str, columns: List[str], rows: List[dict]) -> None:
+    """
+    Stream rows into table with COPY on the session's asyncpg connection,
+    inside the session's transaction.
+    """
+    connection = await db.connection()
+    raw = await connection.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        table,
+        records=[tuple(row[column] for column in columns) for row in rows],
+        columns=columns,
+    )
+
+
+async def save_chunk_rows(
+    db: AsyncSession,
+    chunk_rows: List[dict],
+    location_rows: List[dict],
+) -> None:
+    """
+    Insert all Chunk and ChunkLocation rows of an upload in two batches:
+    COPY on Postgres (asyncpg), bulk INSERTs elsewhere.
+    """
+    if not chunk_rows:
+        return
+
+    dialect = db.get_bind().dialect
+    if dialect.name == "postgresql" and dialect.driver == "asyncpg":
+        await _copy_rows(db, Chunk.__tablename__, ["id", "file_version_id", "index", "size_bytes"], chunk_rows)
+        await _copy_rows(db, ChunkLocation.__tablename__, ["chunk_id", "node_id"], location_rows)
+    else:
+        # one executemany each, batched into multi-row VALUES by SQLAlchemy
+        await db.execute(insert(Chunk), chunk_rows)
+        await db.execute(insert(ChunkLocation), location_rows)
 
 
 
@@ -0,0 +1,53 @@
+"""chunk ids as native uuid
+
+Revision ID: e41b8c93a0d5
+Revises: a7d2e05f6c41
+Create Date: 2026-10-15 11:05:52.318440
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41b8c93a0d5'
+down_revision: Union[str, Sequence[str], None] = 'a7d2e05f6c41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_constraint(op.f('chunk_locations_chunk_id_fkey'), 'chunk_locations', type_='foreignkey')
+    op.alter_column('chunks', 'id',
+               existing_type=sa.VARCHAR(),
+               type_=sa.Uuid(),
+               existing_nullable=False,
+               postgresql_using='id::uuid')
+    op.alter_column('chunk_locations', 'chunk_id',
+               existing_type=sa.VARCHAR(),
+               type_=sa.Uuid(),
+               existing_nullable=False,
+               postgresql_using='chunk_id::uuid')
+    op.create_foreign_key(op.f('chunk_locations_chunk_id_fkey'), 'chunk_locations', 'chunks', ['chunk_id'], ['id'], ondelete='CASCADE')
+    # the primary key already indexes chunks.id
+    op.drop_index(op.f('ix_chunks_id'), table_name='chunks')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_chunks_id'), 'chunks', ['id'], unique=False)
+    op.drop_constraint(op.f('chunk_locations_chunk_id_fkey'), 'chunk_locations', type_='foreignkey')
+    op.alter_column('chunk_locations', 'chunk_id',
+               existing_type=sa.Uuid(),
+               type_=sa.VARCHAR(),
+               existing_nullable=False,
+               postgresql_using='chunk_id::text')
+    op.alter_column('chunks', 'id',
+               existing_type=sa.Uuid(),
+               type_=sa.VARCHAR(),
+               existing_nullable=False,
+               postgresql_using='id::text')
+    op.create_foreign_key(op.f('chunk_locations_chunk_id_fkey'), 'chunk_locations', 'chunks', ['chunk_id'], ['id'], ondelete='CASCADE')
@@ -1,17 +1,38 @@
 import os
+import tempfile
 from pathlib import Path
-import mimetypes
 
-from fastapi import FastAPI, Request, HTTPException, status
+from fastapi import FastAPI, Request, Response, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse
 
-import aiofiles
-
 app = FastAPI(title="Storage Node")
 
 CHUNK_DIR = Path(os.getenv("CHUNK_DIR", "/data/chunks"))
 CHUNK_DIR.mkdir(parents=True, exist_ok=True)
 
+# chunks are written here first, then renamed into CHUNK_DIR
+TMP_DIR = CHUNK_DIR / ".tmp"
+TMP_DIR.mkdir(parents=True, exist_ok=True)
+
+# chunk files are named by chunk id and never have an extension to guess from
+CHUNK_MEDIA_TYPE = "application/octet-stream"
+
+
+def _write_chunk(dest: Path, data: bytes) -> None:
+    """
+    Write data to a temp file and rename it over dest, so readers only ever
+    see complete chunks. Runs in a worker thread.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=TMP_DIR)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, dest)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
 
 @app.get("/health")
 async def health():
@@ -19,18 +40,32 @@ async def health():
 
 
 @app.put("/chunks/{chunk_id}", status_code=status.HTTP_201_CREATED)
-async def put_chunk(chunk_id: str, request: Request):
+async def put_chunk(chunk_id: str, request: Request, response: Response):
     """
-    Store raw request body as a chunk.
+    Store raw request body as a chunk. Idempotent: re-PUTting a chunk that
+    is already stored with the same size is answered without rewriting it.
     """
     dest = CHUNK_DIR / chunk_id
 
+    # chunks are only published complete (see _write_chunk), so a matching
+    # size means a retry of a PUT that already landed
+    content_length = request.headers.get("content-length")
+    if content_length is not None:
+        try:
+            existing_size = os.stat(dest).st_size
+        except FileNotFoundError:
+            existing_size = None
+        if existing_size == int(content_length):
+            response.status_code = status.HTTP_200_OK
+            return {"chunk_id": chunk_id}
+
     # Ensure parent dir exists (for future subdirs)
     dest.parent.mkdir(parents=True, exist_ok=True)
 
-    async with aiofiles.open(dest, "wb") as f:
-        async for chunk in request.stream():
-            await f.write(chunk)
+    # one chunk is at most CHUNK_SIZE_BYTES; take the whole body, then write
+    # it in a single thread hop instead of one hop per received piece
+    data = await request.body()
+    await run_in_threadpool(_write_chunk, dest, data)
 
     return {"chunk_id": chunk_id}
 
@@ -41,12 +76,10 @@ async def get_chunk(chunk_id: str):
     Stream the stored chunk back.
     """
     path = CHUNK_DIR / chunk_id
-    if not path.exists():
+    try:
+        stat_result = os.stat(path)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Chunk not found")
 
-    # Guess MIME type from file extension (pdf, docx, jpg, png, mp4, etc.)
-    mime_type, _ = mimetypes.guess_type(str(path))
-    # Fallback to generic binary stream if unknown
-    media_type = mime_type or "application/octet-stream"
-
-    return FileResponse(path, media_type=media_type)
+    # reuse the stat above instead of FileResponse doing another one
+    return FileResponse(path, media_type=CHUNK_MEDIA_TYPE, stat_result=stat_result)